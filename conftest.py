@@ -0,0 +1 @@
+# 让 pytest 把仓库根目录加入 sys.path，以便测试中 import src
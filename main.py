@@ -10,6 +10,7 @@ from src import config
 from src.embeddings import TextEmbedder
 from src.image_manager import ImageManager
 from src.paper_manager import PaperManager
+from src.watcher import IngestWatcher
 
 
 def parse_topics(raw: str) -> List[str]:
@@ -131,6 +132,28 @@ def cmd_organize(args, paper_mgr: PaperManager, raw_cmd: str) -> None:
     announce(out_dir)
 
 
+def cmd_watch(args, paper_mgr: PaperManager, image_mgr: ImageManager, raw_cmd: str) -> None:
+    out_dir = prepare_output_dir("watch")
+    write_text(out_dir, "command.txt", raw_cmd)
+    announce(out_dir)
+    results_path = out_dir / "results.jsonl"
+
+    def on_result(result: dict) -> None:
+        # 守护进程长时间运行，每入库一个文件追加一行，运行期间也能查看进度
+        with results_path.open("a", encoding="utf-8") as f:
+            f.write(json.dumps(result, ensure_ascii=False) + "\n")
+
+    watcher = IngestWatcher(
+        paper_mgr,
+        image_mgr,
+        topics=parse_topics(args.topics),
+        interval=args.interval,
+        debounce=args.debounce,
+        on_result=on_result,
+    )
+    watcher.run(once=args.once)
+
+
 def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description="论文与图片的多模态管理工具")
     subparsers = parser.add_subparsers(dest="command")
@@ -168,6 +191,17 @@ def build_parser() -> argparse.ArgumentParser:
         help="候选主题，逗号分隔（可选）",
     )
 
+    watch = subparsers.add_parser(
+        "watch",
+        help="持续监听 papers/ 与 images/，后台增量入库新增或修改的文件",
+    )
+    watch.add_argument("--topics", default="", help="候选主题，逗号分隔（可选）")
+    watch.add_argument("--interval", type=float, default=config.WATCH_INTERVAL, help="轮询间隔（秒）")
+    watch.add_argument(
+        "--debounce", type=float, default=config.WATCH_DEBOUNCE, help="文件保持不变多久后才入库（秒）"
+    )
+    watch.add_argument("--once", action="store_true", help="只扫描一次，入库后退出")
+
     return parser
 
 
@@ -198,6 +232,8 @@ def main(argv: List[str] | None = None) -> None:
         # 默认整理 papers 根目录
         args.folder = str(config.PAPERS_DIR)
         cmd_organize(args, paper_mgr, raw_cmd)
+    elif args.command == "watch":
+        cmd_watch(args, paper_mgr, image_mgr, raw_cmd)
     else:
         parser.print_help()
         sys.exit(1)
@@ -0,0 +1,240 @@
+import sys
+from array import array
+from bisect import bisect_right
+from typing import Any, Dict, Iterable, Iterator, List
+
+# 列类型
+POOLED = "pooled"  # 字典编码的字符串（如路径），重复值只存一份
+TAGS = "tags"  # 字典编码的字符串列表（如 topics）
+INT = "int"
+TEXT = "text"  # 所有文本拼接在一个连续缓冲区中，按偏移量惰性切片
+VECTOR = "vector"  # 所有向量拼接在一个 float64 数组中，按偏移量切片
+
+
+class StringPool:
+    __slots__ = ("_values", "_ids")
+
+    def __init__(self):
+        self._values: List[str] = []
+        self._ids: Dict[str, int] = {}
+
+    def intern(self, value: str) -> int:
+        idx = self._ids.get(value)
+        if idx is None:
+            idx = len(self._values)
+            value = sys.intern(value)
+            self._values.append(value)
+            self._ids[value] = idx
+        return idx
+
+    def lookup(self, value: str) -> int | None:
+        return self._ids.get(value)
+
+    def __getitem__(self, idx: int) -> str:
+        return self._values[idx]
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+
+class RaggedColumn:
+    __slots__ = ("_data", "_offsets")
+
+    def __init__(self, typecode: str):
+        self._data = array(typecode)
+        self._offsets = array("Q", [0])
+
+    def append(self, values: Iterable) -> None:
+        self._data.extend(values)
+        self._offsets.append(len(self._data))
+
+    def __getitem__(self, idx: int) -> array:
+        return self._data[self._offsets[idx] : self._offsets[idx + 1]]
+
+    def row_len(self, idx: int) -> int:
+        return self._offsets[idx + 1] - self._offsets[idx]
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+
+class TextColumn:
+    __slots__ = ("_blocks", "_block_starts", "_pending", "_offsets")
+
+    def __init__(self):
+        # 文本按块存放：加载时整列拼成一个块，之后追加的记录在 freeze 时另拼成新块
+        self._blocks: List[str] = []
+        self._block_starts = array("Q")
+        self._pending: List[str] = []
+        self._offsets = array("Q", [0])
+
+    def append(self, text: str) -> None:
+        self._pending.append(text)
+        self._offsets.append(self._offsets[-1] + len(text))
+
+    def freeze(self) -> None:
+        if not self._pending:
+            return
+        start = self._block_starts[-1] + len(self._blocks[-1]) if self._blocks else 0
+        self._blocks.append("".join(self._pending))
+        self._block_starts.append(start)
+        self._pending = []
+
+    def __getitem__(self, idx: int) -> str:
+        start, end = self._offsets[idx], self._offsets[idx + 1]
+        if start == end:
+            return ""
+        self.freeze()
+        block = bisect_right(self._block_starts, start) - 1
+        base = self._block_starts[block]
+        return self._blocks[block][start - base : end - base]
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+
+class IndexRow:
+    """索引中单条记录的只读视图，字段在访问时才从列中取出。"""
+
+    __slots__ = ("_index", "_pos")
+
+    def __init__(self, index: "ColumnarIndex", pos: int):
+        self._index = index
+        self._pos = pos
+
+    def __getitem__(self, name: str) -> Any:
+        if name not in self._index.FIELDS:
+            raise KeyError(name)
+        return self._index.get(self._pos, name)
+
+    def get(self, name: str, default: Any = None) -> Any:
+        if name not in self._index.FIELDS:
+            return default
+        return self._index.get(self._pos, name)
+
+
+class ColumnarIndex:
+    """按列存储的内存索引，子类通过 FIELDS 声明字段名与列类型。
+
+    与 storage.load_index 返回的 dict 列表互相转换，磁盘上的 JSON 格式保持不变。
+    """
+
+    FIELDS: Dict[str, str] = {}
+
+    __slots__ = ("_columns", "_pools", "_size")
+
+    def __init__(self, records: Iterable[Dict[str, Any]] = ()):
+        self._columns: Dict[str, Any] = {}
+        self._pools: Dict[str, StringPool] = {}
+        for name, kind in self.FIELDS.items():
+            if kind == POOLED:
+                self._pools[name] = StringPool()
+                self._columns[name] = array("I")
+            elif kind == TAGS:
+                self._pools[name] = StringPool()
+                self._columns[name] = RaggedColumn("I")
+            elif kind == INT:
+                self._columns[name] = array("q")
+            elif kind == TEXT:
+                self._columns[name] = TextColumn()
+            elif kind == VECTOR:
+                self._columns[name] = RaggedColumn("d")
+            else:
+                raise ValueError(f"Unknown column kind {kind!r} for field {name!r}")
+        self._size = 0
+        self.extend(records)
+
+    def append(self, record: Dict[str, Any]) -> None:
+        for name, kind in self.FIELDS.items():
+            value = record.get(name)
+            column = self._columns[name]
+            if kind == POOLED:
+                column.append(self._pools[name].intern(value or ""))
+            elif kind == TAGS:
+                pool = self._pools[name]
+                column.append(pool.intern(tag) for tag in value or ())
+            elif kind == INT:
+                column.append(int(value or 0))
+            elif kind == TEXT:
+                column.append(value or "")
+            else:
+                column.append(value or ())
+        self._size += 1
+
+    def extend(self, records: Iterable[Dict[str, Any]]) -> None:
+        for record in records:
+            self.append(record)
+        self.freeze()
+
+    def freeze(self) -> None:
+        # 把暂存的文本拼进连续缓冲区，之后读取只做切片
+        for name, kind in self.FIELDS.items():
+            if kind == TEXT:
+                self._columns[name].freeze()
+
+    def get(self, pos: int, name: str) -> Any:
+        kind = self.FIELDS[name]
+        value = self._columns[name][pos]
+        if kind == POOLED:
+            return self._pools[name][value]
+        if kind == TAGS:
+            pool = self._pools[name]
+            return [pool[idx] for idx in value]
+        return value
+
+    def row(self, pos: int) -> IndexRow:
+        if not 0 <= pos < self._size:
+            raise IndexError(pos)
+        return IndexRow(self, pos)
+
+    def record(self, pos: int) -> Dict[str, Any]:
+        result: Dict[str, Any] = {}
+        for name, kind in self.FIELDS.items():
+            value = self.get(pos, name)
+            result[name] = value.tolist() if kind == VECTOR else value
+        return result
+
+    def to_records(self) -> Iterator[Dict[str, Any]]:
+        # 逐条生成，保存时无需在内存中同时持有全部 dict
+        return (self.record(pos) for pos in range(self._size))
+
+    def values(self, name: str) -> Iterator[Any]:
+        return (self.get(pos, name) for pos in range(self._size))
+
+    def contains(self, name: str, value: str) -> bool:
+        # 仅适用于 POOLED 字段；池中只保存仍在索引里的值
+        return self._pools[name].lookup(value) is not None
+
+    def without(self, name: str, *values: str) -> "ColumnarIndex":
+        """返回去掉 POOLED 字段 name 等于任一 values 的记录后的新索引，只重建一次。"""
+        pool = self._pools[name]
+        targets = {pool.lookup(value) for value in values} - {None}
+        if not targets:
+            return self
+        column = self._columns[name]
+        kept = (self.record(pos) for pos in range(self._size) if column[pos] not in targets)
+        return type(self)(kept)
+
+    def vector_dim(self, name: str = "embedding") -> int:
+        return self._columns[name].row_len(0) if self._size else 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator[IndexRow]:
+        return (IndexRow(self, pos) for pos in range(self._size))
+
+
+class PaperIndex(ColumnarIndex):
+    __slots__ = ()
+    FIELDS = {"path": POOLED, "topics": TAGS, "summary": TEXT, "embedding": VECTOR}
+
+
+class ChunkIndex(ColumnarIndex):
+    __slots__ = ()
+    FIELDS = {"paper_path": POOLED, "page": INT, "text": TEXT, "embedding": VECTOR}
+
+
+class ImageIndex(ColumnarIndex):
+    __slots__ = ()
+    FIELDS = {"path": POOLED, "caption": TEXT, "embedding": VECTOR}
@@ -14,6 +14,8 @@ OUTPUT_DIR.mkdir(exist_ok=True)
 PAPER_INDEX_PATH = DATA_DIR / "paper_index.json"
 CHUNK_INDEX_PATH = DATA_DIR / "chunk_index.json"
 IMAGE_INDEX_PATH = DATA_DIR / "image_index.json"
+INGEST_MANIFEST_PATH = DATA_DIR / "ingest_manifest.json"  # watch 模式已入库文件清单
+WATCH_PID_PATH = DATA_DIR / "watch.pid"  # watch 运行期间存在，检索命令据此跳过同步补索引
 
 # 模型与端口配置
 # - TEXT_*：文本端口，必须支持 chat/completions（主题分类）。示例：http://HOST:8789/v1。
@@ -38,3 +40,7 @@ PREFER_REMOTE_EMBEDDING = os.environ.get("PREFER_REMOTE_EMBEDDING", "1").lower()
 DEFAULT_TOP_K = 5
 CHUNK_SIZE = 800  # 分页拆分时的每段字符数
 MAX_CHUNKS_PER_DOC = 200
+
+# watch 模式：轮询间隔与防抖时间（秒），文件在防抖时间内大小/修改时间不变才会入库
+WATCH_INTERVAL = float(os.environ.get("WATCH_INTERVAL", "5"))
+WATCH_DEBOUNCE = float(os.environ.get("WATCH_DEBOUNCE", "3"))
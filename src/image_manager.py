@@ -6,8 +6,9 @@ from typing import Dict, List
 
 from . import config, storage
 from .clients import get_vision_client
+from .columnar import ImageIndex
 from .embeddings import TextEmbedder
-from .paper_manager import cosine_similarity
+from .paper_manager import rank_rows
 
 logger = logging.getLogger(__name__)
 
@@ -24,56 +25,65 @@ class ImageManager:
         if not directory.exists():
             raise FileNotFoundError(f"{directory} does not exist")
 
-        index = storage.load_index(config.IMAGE_INDEX_PATH)
-        indexed_paths = {item["path"] for item in index}
+        index = storage.load_columnar(config.IMAGE_INDEX_PATH, ImageIndex)
         new_entries: List[Dict] = []
 
         for image_path in directory.rglob("*"):
             if image_path.is_dir() or image_path.suffix.lower() not in IMAGE_EXTS:
                 continue
-            if str(image_path) in indexed_paths:
+            if index.contains("path", str(image_path)):
                 continue
-            caption = self._caption_image(str(image_path))
-            embedding = self.embedder.embed([caption])[0]
-            entry = {"path": str(image_path), "caption": caption, "embedding": embedding}
-            index.append(entry)
-            new_entries.append(entry)
-
-        if new_entries:
-            storage.save_index(config.IMAGE_INDEX_PATH, index)
+            new_entries.append(self.build_entry(str(image_path)))
+
+        self.save_entries(new_entries)
         return new_entries
 
+    def build_entry(self, image_path: str) -> Dict:
+        if not Path(image_path).exists():
+            raise FileNotFoundError(f"{image_path} does not exist")
+        caption = self._caption_image(image_path)
+        embedding = self.embedder.embed([caption])[0]
+        return {"path": image_path, "caption": caption, "embedding": embedding}
+
+    def save_entries(self, entries: List[Dict]) -> None:
+        # 生成 caption 可能耗时很久，保存前重新读取索引，保留期间其它进程写入的条目；同路径的旧条目被覆盖
+        if not entries:
+            return
+        index = storage.load_columnar(config.IMAGE_INDEX_PATH, ImageIndex)
+        index = index.without("path", *(entry["path"] for entry in entries))
+        index.extend(entries)
+        storage.save_columnar(config.IMAGE_INDEX_PATH, index)
+
     def search_images(self, query: str, top_k: int = config.DEFAULT_TOP_K) -> List[Dict]:
-        index = storage.load_index(config.IMAGE_INDEX_PATH)
+        index = storage.load_columnar(config.IMAGE_INDEX_PATH, ImageIndex)
 
         # 自动补充新图片的索引，已索引的跳过
         directory = config.IMAGES_DIR
-        indexed_paths = {item.get("path") for item in index}
         has_new_files = any(
-            str(p) not in indexed_paths
+            not index.contains("path", str(p))
             for p in directory.rglob("*")
             if p.is_file() and p.suffix.lower() in IMAGE_EXTS
         )
         if not index or has_new_files:
-            self.index_images(str(directory))
-            index = storage.load_index(config.IMAGE_INDEX_PATH)
+            # watch 在后台入库时不在检索中同步生成 caption，避免检索卡顿以及两个进程互相覆盖索引
+            if storage.pid_file_active(config.WATCH_PID_PATH):
+                logger.warning(
+                    "New images are not indexed yet: watch (pid file %s) is indexing them in the background. "
+                    "Delete the pid file if no watch process is running.",
+                    config.WATCH_PID_PATH,
+                )
+            else:
+                self.index_images(str(directory))
+                index = storage.load_columnar(config.IMAGE_INDEX_PATH, ImageIndex)
 
         if not index:
             return []
-        ref_dim = len(index[0].get("embedding", [])) or None
+        ref_dim = index.vector_dim() or None
         query_embedding = self.embedder.embed([query], target_dim=ref_dim)[0]
-        scored = []
-        for entry in index:
-            score = cosine_similarity(query_embedding, entry.get("embedding", []))
-            scored.append(
-                {
-                    "path": entry.get("path"),
-                    "caption": entry.get("caption", ""),
-                    "score": score,
-                }
-            )
-        scored.sort(key=lambda x: x["score"], reverse=True)
-        return scored[:top_k]
+        return [
+            {"path": row["path"], "caption": row["caption"], "score": score}
+            for row, score in rank_rows(index, query_embedding, top_k)
+        ]
 
     def _caption_image(self, image_path: str) -> str:
         prompt = (
@@ -1,17 +1,19 @@
+import heapq
 import logging
 import math
 import shutil
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, List, Sequence, Tuple
 
 from . import config, pdf_utils, storage
 from .clients import get_text_client
+from .columnar import ChunkIndex, ColumnarIndex, IndexRow, PaperIndex
 from .embeddings import TextEmbedder
 
 logger = logging.getLogger(__name__)
 
 
-def cosine_similarity(a: List[float], b: List[float]) -> float:
+def cosine_similarity(a: Sequence[float], b: Sequence[float]) -> float:
     if not a or not b or len(a) != len(b):
         return 0.0
     dot = sum(x * y for x, y in zip(a, b))
@@ -22,6 +24,12 @@ def cosine_similarity(a: List[float], b: List[float]) -> float:
     return dot / (norm_a * norm_b)
 
 
+def rank_rows(index: ColumnarIndex, query_embedding: Sequence[float], top_k: int) -> List[Tuple[IndexRow, float]]:
+    scores = [cosine_similarity(query_embedding, emb) for emb in index.values("embedding")]
+    best = heapq.nlargest(top_k, range(len(scores)), key=scores.__getitem__)
+    return [(index.row(pos), scores[pos]) for pos in best]
+
+
 class PaperManager:
     def __init__(self, embedder: TextEmbedder | None = None):
         self.embedder = embedder or TextEmbedder()
@@ -42,27 +50,30 @@ class PaperManager:
             shutil.move(str(path), dest_path)
         else:
             dest_path = path
+        # 重新入库时若论文被移动到别的主题目录，原路径的条目也一并删除
+        stale_paths = (str(dest_path), str(path))
 
         doc_text = " ".join(pages)
         trimmed_text = doc_text[:5000]
         paper_embedding = self.embedder.embed([trimmed_text])[0]
         summary = trimmed_text[:500]
 
-        paper_index = storage.load_index(config.PAPER_INDEX_PATH)
+        paper_index = storage.load_columnar(config.PAPER_INDEX_PATH, PaperIndex)
         paper_entry = {
             "path": str(dest_path),
             "topics": chosen_topics or ["uncategorized"],
             "summary": summary,
             "embedding": paper_embedding,
         }
-        paper_index = [p for p in paper_index if p.get("path") != str(dest_path)]
+        paper_index = paper_index.without("path", *stale_paths)
         paper_index.append(paper_entry)
-        storage.save_index(config.PAPER_INDEX_PATH, paper_index)
+        storage.save_columnar(config.PAPER_INDEX_PATH, paper_index)
 
-        chunk_index = storage.load_index(config.CHUNK_INDEX_PATH)
-        chunk_index = [c for c in chunk_index if c.get("paper_path") != str(dest_path)]
+        # 先完成耗时的 embedding，再读取-修改-保存片段索引，缩短与其它进程并发写入的窗口
         chunks = pdf_utils.chunk_pages(pages)
         embeddings = self.embedder.embed([c[1] for c in chunks])
+        chunk_index = storage.load_columnar(config.CHUNK_INDEX_PATH, ChunkIndex)
+        chunk_index = chunk_index.without("paper_path", *stale_paths)
         for (page_number, text), embedding in zip(chunks, embeddings):
             chunk_index.append(
                 {
@@ -72,7 +83,7 @@ class PaperManager:
                     "embedding": embedding,
                 }
             )
-        storage.save_index(config.CHUNK_INDEX_PATH, chunk_index)
+        storage.save_columnar(config.CHUNK_INDEX_PATH, chunk_index)
 
         return {"path": str(dest_path), "topics": chosen_topics, "chunks_indexed": len(chunks)}
 
@@ -80,11 +91,7 @@ class PaperManager:
         dir_path = Path(source_dir)
         if not dir_path.exists():
             raise FileNotFoundError(f"{source_dir} does not exist")
-        effective_topics = [t.strip() for t in (topics or []) if t.strip()]
-        if not effective_topics:
-            effective_topics = self._known_topics()
-        if not effective_topics:
-            effective_topics = ["uncategorized"]
+        effective_topics = self.resolve_topics(topics)
         results: List[Dict] = []
         for pdf in dir_path.rglob("*.pdf"):
             try:
@@ -93,45 +100,47 @@ class PaperManager:
                 logger.error("Failed to add %s: %s", pdf, exc)
         return results
 
+    def resolve_topics(self, topics: List[str] | None = None) -> List[str]:
+        # 未指定候选主题时，使用 papers/ 下已有的主题目录
+        effective_topics = [t.strip() for t in (topics or []) if t.strip()]
+        if not effective_topics:
+            effective_topics = self._known_topics()
+        if not effective_topics:
+            effective_topics = ["uncategorized"]
+        return effective_topics
+
     def search_papers(self, query: str, top_k: int = config.DEFAULT_TOP_K) -> List[Dict]:
-        paper_index = storage.load_index(config.PAPER_INDEX_PATH)
+        paper_index = storage.load_columnar(config.PAPER_INDEX_PATH, PaperIndex)
         if not paper_index:
             return []
-        ref_dim = len(paper_index[0].get("embedding", [])) or None
+        ref_dim = paper_index.vector_dim() or None
         query_embedding = self.embedder.embed([query], target_dim=ref_dim)[0]
-        scored = []
-        for entry in paper_index:
-            score = cosine_similarity(query_embedding, entry.get("embedding", []))
-            scored.append(
-                {
-                    "path": entry.get("path"),
-                    "topics": entry.get("topics", []),
-                    "summary": entry.get("summary", ""),
-                    "score": score,
-                }
-            )
-        scored.sort(key=lambda x: x["score"], reverse=True)
-        return scored[:top_k]
+        # 只为 top_k 条结果构造 dict
+        return [
+            {
+                "path": row["path"],
+                "topics": row["topics"],
+                "summary": row["summary"],
+                "score": score,
+            }
+            for row, score in rank_rows(paper_index, query_embedding, top_k)
+        ]
 
     def search_chunks(self, query: str, top_k: int = config.DEFAULT_TOP_K) -> List[Dict]:
-        chunk_index = storage.load_index(config.CHUNK_INDEX_PATH)
+        chunk_index = storage.load_columnar(config.CHUNK_INDEX_PATH, ChunkIndex)
         if not chunk_index:
             return []
-        ref_dim = len(chunk_index[0].get("embedding", [])) or None
+        ref_dim = chunk_index.vector_dim() or None
         query_embedding = self.embedder.embed([query], target_dim=ref_dim)[0]
-        scored = []
-        for entry in chunk_index:
-            score = cosine_similarity(query_embedding, entry.get("embedding", []))
-            scored.append(
-                {
-                    "paper_path": entry.get("paper_path"),
-                    "page": entry.get("page"),
-                    "text": entry.get("text"),
-                    "score": score,
-                }
-            )
-        scored.sort(key=lambda x: x["score"], reverse=True)
-        return scored[:top_k]
+        return [
+            {
+                "paper_path": row["paper_path"],
+                "page": row["page"],
+                "text": row["text"],
+                "score": score,
+            }
+            for row, score in rank_rows(chunk_index, query_embedding, top_k)
+        ]
 
     def _classify_topics(self, pages: List[str], topics: List[str]) -> List[str]:
         if not topics:
@@ -1,6 +1,14 @@
 import json
+import os
+import threading
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable, Iterator, List, Type, TypeVar
+
+from .columnar import ColumnarIndex
+
+IndexT = TypeVar("IndexT", bound=ColumnarIndex)
+
+READ_CHUNK_SIZE = 1 << 20
 
 
 def load_index(path: Path) -> List[Dict[str, Any]]:
@@ -10,7 +18,125 @@ def load_index(path: Path) -> List[Dict[str, Any]]:
         return json.load(f)
 
 
-def save_index(path: Path, data: List[Dict[str, Any]]) -> None:
+def iter_index(path: Path) -> Iterator[Dict[str, Any]]:
+    """逐条解析索引文件中的记录，按块读取文件，不把整个 JSON 一次读入内存。"""
+    if not path.exists():
+        return
+    decoder = json.JSONDecoder()
+    with path.open("r", encoding="utf-8") as f:
+        buf, pos, eof, started = "", 0, False, False
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n,":
+                pos += 1
+            if pos == len(buf):
+                if eof:
+                    raise ValueError(f"{path} ended before the closing ']'")
+                chunk = f.read(READ_CHUNK_SIZE)
+                eof = not chunk
+                buf, pos = chunk, 0
+                continue
+            if not started:
+                if buf[pos] != "[":
+                    raise ValueError(f"{path} does not contain a JSON list")
+                started = True
+                pos += 1
+                continue
+            if buf[pos] == "]":
+                return
+            try:
+                record, pos = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                # 记录跨越了块边界，补读下一块后重试
+                if eof:
+                    raise
+                chunk = f.read(READ_CHUNK_SIZE)
+                eof = not chunk
+                buf, pos = buf[pos:] + chunk, 0
+                continue
+            yield record
+
+
+def save_index(path: Path, data: Iterable[Dict[str, Any]]) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    # 先写临时文件再替换，避免 watch 后台写入时其它命令读到半个文件；
+    # 临时文件名带 pid 和线程号，多个进程可同时写；用普通 open 创建，权限仍遵循 umask
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with tmp_path.open("w", encoding="utf-8") as f:
+            # 逐条写出，输出与 json.dump(indent=2) 一致，但不要求 data 是完整列表
+            f.write("[")
+            empty = True
+            for record in data:
+                f.write("\n  " if empty else ",\n  ")
+                f.write(json.dumps(record, ensure_ascii=False, indent=2).replace("\n", "\n  "))
+                empty = False
+            f.write("]" if empty else "\n]")
+        try:
+            # 与直接覆盖写入一致，保留原文件的权限
+            os.chmod(tmp_path, path.stat().st_mode & 0o7777)
+        except FileNotFoundError:
+            pass
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    os.replace(tmp_path, path)
+
+
+def load_columnar(path: Path, index_cls: Type[IndexT]) -> IndexT:
+    # 每解析出一条记录就写入列中，不保留完整的 dict 列表和文件内容
+    return index_cls(iter_index(path))
+
+
+def save_columnar(path: Path, index: ColumnarIndex) -> None:
+    save_index(path, index.to_records())
+
+
+def write_pid_file(path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(str(os.getpid()), encoding="utf-8")
+
+
+def remove_pid_file(path: Path) -> None:
+    # 只删除本进程写入的 pid 文件
+    try:
+        if path.read_text(encoding="utf-8").strip() == str(os.getpid()):
+            path.unlink()
+    except (FileNotFoundError, ValueError):
+        pass
+
+
+def pid_file_active(path: Path) -> bool:
+    try:
+        pid = int(path.read_text(encoding="utf-8").strip())
+    except (FileNotFoundError, ValueError):
+        return False
+    if os.name == "nt":
+        return _windows_pid_alive(pid)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _windows_pid_alive(pid: int) -> bool:
+    # Windows 上 os.kill(pid, 0) 会结束进程，改用 OpenProcess/GetExitCodeProcess 查询
+    import ctypes
+
+    process_query_limited_information = 0x1000
+    error_access_denied = 5
+    still_active = 259
+    kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+    handle = kernel32.OpenProcess(process_query_limited_information, False, pid)
+    if not handle:
+        # 进程存在但属于其它用户时会拒绝访问
+        return ctypes.get_last_error() == error_access_denied
+    try:
+        exit_code = ctypes.c_ulong()
+        if not kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code)):
+            return False
+        return exit_code.value == still_active
+    finally:
+        kernel32.CloseHandle(handle)
@@ -0,0 +1,271 @@
+import logging
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Tuple
+
+from . import config, storage
+from .columnar import ImageIndex, PaperIndex
+from .image_manager import IMAGE_EXTS, ImageManager
+from .paper_manager import PaperManager
+
+logger = logging.getLogger(__name__)
+
+PAPER = "paper"
+IMAGE = "image"
+IMAGE_FLUSH_EVERY = 32  # 每生成多少条图片 caption 写一次图片索引
+
+Signature = Tuple[int, int]  # (st_mtime_ns, st_size)
+
+
+def file_signature(path: Path) -> Signature:
+    stat = path.stat()
+    return stat.st_mtime_ns, stat.st_size
+
+
+class IngestWatcher:
+    """轮询 papers/ 与 images/，把新增或修改过的文件交给后台线程入库。
+
+    已入库文件记录在 INGEST_MANIFEST_PATH 中（路径 + 修改时间 + 大小），
+    签名未变的文件直接跳过；文件签名需在 debounce 秒内保持不变才会入库，
+    避免处理尚未拷贝完成的文件。
+    """
+
+    def __init__(
+        self,
+        paper_mgr: PaperManager,
+        image_mgr: ImageManager,
+        topics: List[str] | None = None,
+        interval: float = config.WATCH_INTERVAL,
+        debounce: float = config.WATCH_DEBOUNCE,
+        on_result: Callable[[Dict], None] | None = None,
+    ):
+        self.paper_mgr = paper_mgr
+        self.image_mgr = image_mgr
+        self.topics = topics or []
+        self.interval = interval
+        self.debounce = debounce
+        self.on_result = on_result
+        self._manifest: Dict[str, Dict] = {
+            item["path"]: item for item in storage.load_index(config.INGEST_MANIFEST_PATH)
+        }
+        # path -> (kind, 签名, 首次看到该签名的时间)
+        self._pending: Dict[str, Tuple[str, Signature, float]] = {}
+        self._queue: "queue.Queue[List[Tuple[str, str]] | None]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._busy = threading.Event()
+        self._stop = threading.Event()
+        self._worker: threading.Thread | None = None
+        self._seed_manifest()
+
+    def run(self, once: bool = False) -> None:
+        storage.write_pid_file(config.WATCH_PID_PATH)
+        try:
+            self._start_worker()
+            try:
+                if once:
+                    # 单次模式不做防抖，入库当前所有新增/修改的文件后退出
+                    self._enqueue(self.scan(debounce=0))
+                    self._stop_worker(cancel=False)
+                    return
+                while True:
+                    if not self._worker.is_alive():
+                        raise RuntimeError("Ingest worker thread stopped unexpectedly")
+                    if not self._busy.is_set() and self._queue.empty():
+                        self._enqueue(self.scan())
+                    else:
+                        # 后台正在入库时只跟踪文件变化，不派发新任务，避免把刚被移动的论文当成新文件
+                        self.scan(dispatch=False)
+                    time.sleep(self.interval)
+            except KeyboardInterrupt:
+                logger.info("Stopping watcher")
+            finally:
+                self._stop_worker()
+        finally:
+            # 即使再次 Ctrl+C 打断了等待，也要删除 pid 文件
+            storage.remove_pid_file(config.WATCH_PID_PATH)
+
+    def scan(self, debounce: float | None = None, dispatch: bool = True) -> List[Tuple[str, str]]:
+        """扫描目录，返回已经稳定、需要入库的 (kind, path)。dispatch=False 时只更新跟踪状态。"""
+        debounce = self.debounce if debounce is None else debounce
+        now = time.monotonic()
+        ready: List[Tuple[str, str]] = []
+        seen = set()
+        with self._lock:
+            for kind, path in self._discover():
+                key = str(path)
+                seen.add(key)
+                try:
+                    signature = file_signature(path)
+                except FileNotFoundError:
+                    continue
+                record = self._manifest.get(key)
+                if record and (record["mtime_ns"], record["size"]) == signature:
+                    self._pending.pop(key, None)
+                    continue
+                pending = self._pending.get(key)
+                if pending is None or pending[1] != signature:
+                    pending = (kind, signature, now)
+                    self._pending[key] = pending
+                if dispatch and now - pending[2] >= debounce:
+                    ready.append((kind, key))
+            for key in list(self._pending):
+                if key not in seen:
+                    del self._pending[key]
+            vanished = [key for key in self._manifest if key not in seen]
+            for key in vanished:
+                del self._manifest[key]
+            if vanished:
+                self._save_manifest()
+        for _, key in ready:
+            self._pending.pop(key, None)
+        if ready:
+            with self._lock:
+                ready = self._skip_indexed(ready)
+        return ready
+
+    def _discover(self) -> Iterator[Tuple[str, Path]]:
+        if config.PAPERS_DIR.exists():
+            for pdf in config.PAPERS_DIR.rglob("*.pdf"):
+                yield PAPER, pdf
+        if config.IMAGES_DIR.exists():
+            for image_path in config.IMAGES_DIR.rglob("*"):
+                if image_path.is_file() and image_path.suffix.lower() in IMAGE_EXTS:
+                    yield IMAGE, image_path
+
+    def _seed_manifest(self) -> None:
+        # 首次启动时，把已经在索引里的文件直接记入清单，不重复入库
+        self._skip_indexed([(kind, str(path)) for kind, path in self._discover()])
+
+    def _skip_indexed(self, candidates: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+        # 清单里没有、但已在索引中的文件（例如其它进程 add_paper/sort_paper 刚入库的）只记入清单，不再入库
+        unknown = {kind for kind, key in candidates if key not in self._manifest}
+        if not unknown:
+            return candidates
+        indexes = {}
+        if PAPER in unknown:
+            indexes[PAPER] = storage.load_columnar(config.PAPER_INDEX_PATH, PaperIndex)
+        if IMAGE in unknown:
+            indexes[IMAGE] = storage.load_columnar(config.IMAGE_INDEX_PATH, ImageIndex)
+        remaining: List[Tuple[str, str]] = []
+        changed = False
+        for kind, key in candidates:
+            if key not in self._manifest and indexes[kind].contains("path", key):
+                self._record(kind, key)
+                changed = True
+            else:
+                remaining.append((kind, key))
+        if changed:
+            self._save_manifest()
+        return remaining
+
+    def _enqueue(self, ready: List[Tuple[str, str]]) -> None:
+        if ready:
+            self._busy.set()
+            self._queue.put(ready)
+
+    def _start_worker(self) -> None:
+        self._worker = threading.Thread(target=self._work, name="ingest-worker", daemon=True)
+        self._worker.start()
+
+    def _stop_worker(self, cancel: bool = True) -> None:
+        # cancel=True 时当前文件处理完即停止，剩余文件留到下次启动；否则等队列中的任务全部完成
+        if self._worker is None:
+            return
+        if cancel:
+            self._stop.set()
+        self._queue.put(None)
+        self._worker.join()
+        self._worker = None
+
+    def _work(self) -> None:
+        while True:
+            batch = self._queue.get()
+            if batch is None:
+                return
+            try:
+                self._ingest(batch)
+            except Exception:  # noqa: BLE001
+                # 批次中未记入清单的文件会在下一轮扫描时重试，线程本身不能退出
+                logger.exception("Ingest batch failed")
+            finally:
+                self._busy.clear()
+
+    def _ingest(self, batch: List[Tuple[str, str]]) -> None:
+        topics = self.paper_mgr.resolve_topics(self.topics)
+        for kind, path in batch:
+            if self._stop.is_set():
+                return
+            if kind != PAPER:
+                continue
+            try:
+                result = self.paper_mgr.add_paper(path, topics)
+            except Exception as exc:  # noqa: BLE001
+                logger.error("Failed to add %s: %s", path, exc)
+                # 失败的文件也记入清单，内容变化后才会重试，避免每轮都报错
+                with self._lock:
+                    self._record(PAPER, path, error=str(exc))
+                    self._save_manifest()
+                continue
+            with self._lock:
+                # add_paper 可能把论文移动到主题目录，清单记录移动后的路径
+                self._manifest.pop(path, None)
+                self._record(PAPER, result["path"])
+                self._save_manifest()
+            self._report({"kind": PAPER, "source": path, **result})
+
+        # 图片逐张生成 caption，攒够 IMAGE_FLUSH_EVERY 条再合并写入索引，写入后才记入清单
+        entries: List[Dict] = []
+        try:
+            for kind, path in batch:
+                if self._stop.is_set():
+                    return
+                if kind != IMAGE:
+                    continue
+                try:
+                    entries.append(self.image_mgr.build_entry(path))
+                except Exception as exc:  # noqa: BLE001
+                    logger.error("Failed to index image %s: %s", path, exc)
+                    with self._lock:
+                        self._record(IMAGE, path, error=str(exc))
+                        self._save_manifest()
+                    continue
+                if len(entries) >= IMAGE_FLUSH_EVERY:
+                    flushed, entries = entries, []
+                    self._flush_images(flushed)
+        finally:
+            # 停止或出错时也保存已生成的 caption，避免重新调用多模态模型
+            self._flush_images(entries)
+
+    def _flush_images(self, entries: List[Dict]) -> None:
+        if not entries:
+            return
+        self.image_mgr.save_entries(entries)
+        with self._lock:
+            for entry in entries:
+                self._record(IMAGE, entry["path"])
+            self._save_manifest()
+        for entry in entries:
+            self._report({"kind": IMAGE, "path": entry["path"], "caption": entry["caption"]})
+
+    def _record(self, kind: str, path: str, error: str | None = None) -> None:
+        try:
+            mtime_ns, size = file_signature(Path(path))
+        except FileNotFoundError:
+            return
+        record = {"path": path, "kind": kind, "mtime_ns": mtime_ns, "size": size}
+        if error:
+            record["error"] = error
+        self._manifest[path] = record
+
+    def _save_manifest(self) -> None:
+        storage.save_index(config.INGEST_MANIFEST_PATH, list(self._manifest.values()))
+
+    def _report(self, result: Dict) -> None:
+        if self.on_result is None:
+            return
+        try:
+            self.on_result(result)
+        except Exception:  # noqa: BLE001
+            logger.exception("on_result callback failed for %s", result.get("path"))
@@ -0,0 +1,77 @@
+import json
+
+import pytest
+
+from src import storage
+from src.columnar import ChunkIndex, PaperIndex
+
+RECORDS = [
+    {"paper_path": "/papers/CV/a.pdf", "page": 1, "text": "中文 text ]},[", "embedding": [0.5, -1.25]},
+    {"paper_path": "/papers/CV/a.pdf", "page": 2, "text": "", "embedding": [0.0, 1.0]},
+    {"paper_path": "/papers/NLP/b.pdf", "page": 1, "text": "line\nbreak \"quoted\"", "embedding": [1e-9, 3.0]},
+]
+
+
+def write_reference(path, records):
+    path.write_text(json.dumps(records, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 64, 1000])
+def test_iter_index_records_across_block_boundaries(tmp_path, monkeypatch, chunk_size):
+    monkeypatch.setattr(storage, "READ_CHUNK_SIZE", chunk_size)
+    path = tmp_path / "chunk_index.json"
+    write_reference(path, RECORDS)
+    assert list(storage.iter_index(path)) == RECORDS
+
+    path.write_text(json.dumps(RECORDS, ensure_ascii=False), encoding="utf-8")
+    assert list(storage.iter_index(path)) == RECORDS
+
+
+def test_iter_index_empty_and_missing(tmp_path):
+    path = tmp_path / "index.json"
+    assert list(storage.iter_index(path)) == []
+    path.write_text("[]", encoding="utf-8")
+    assert list(storage.iter_index(path)) == []
+    assert len(storage.load_columnar(path, ChunkIndex)) == 0
+
+
+def test_iter_index_truncated_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "READ_CHUNK_SIZE", 4)
+    path = tmp_path / "index.json"
+    path.write_text('[{"paper_path": "a"}', encoding="utf-8")
+    with pytest.raises(ValueError):
+        list(storage.iter_index(path))
+
+
+def test_save_columnar_matches_json_dump(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "READ_CHUNK_SIZE", 5)
+    ref = tmp_path / "ref.json"
+    out = tmp_path / "out.json"
+    write_reference(ref, RECORDS)
+    storage.save_columnar(out, storage.load_columnar(ref, ChunkIndex))
+    assert out.read_bytes() == ref.read_bytes()
+
+    storage.save_columnar(out, ChunkIndex())
+    assert out.read_text(encoding="utf-8") == json.dumps([], indent=2)
+
+
+def test_text_slicing_after_append_and_without():
+    index = ChunkIndex(RECORDS)
+    assert index.get(0, "text") == RECORDS[0]["text"]
+    assert index.get(1, "text") == ""
+
+    index.append({"paper_path": "/papers/RL/c.pdf", "page": 3, "text": "appended", "embedding": [1.0, 0.0]})
+    assert index.get(3, "text") == "appended"
+    assert index.get(2, "text") == RECORDS[2]["text"]
+
+    trimmed = index.without("paper_path", "/papers/CV/a.pdf")
+    assert [row["text"] for row in trimmed] == [RECORDS[2]["text"], "appended"]
+    assert not trimmed.contains("paper_path", "/papers/CV/a.pdf")
+    assert index.without("paper_path", "/missing.pdf") is index
+
+
+def test_record_round_trip_with_tags():
+    records = [{"path": "/papers/CV/a.pdf", "topics": ["CV", "Multi"], "summary": "s", "embedding": [0.25]}]
+    index = PaperIndex(records)
+    assert list(index.to_records()) == records
+    assert index.row(0).get("missing", "default") == "default"